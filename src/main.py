@@ -5,40 +5,295 @@ This API evolves daily through Claude Code suggestions and implementations.
 See evolution/history.md for the complete evolution log.
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-from uuid import uuid4
-from datetime import datetime
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import AfterValidator, BaseModel, BeforeValidator
+from typing import Annotated, Optional
+import re
+import sys
+from datetime import datetime, timedelta
+from collections import defaultdict
+from functools import lru_cache
+from bisect import bisect_right
+from itertools import accumulate, count, groupby, islice
+from operator import itemgetter
+from sortedcontainers import SortedKeyList, SortedList
+
+try:
+    import orjson
+except ImportError:  # orjson is a CPython extension; PyPy falls back to stdlib json
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    Item endpoints return one directly: stored rows already match the Item schema, so
+    this skips FastAPI's per-item response validation while response_model still
+    documents the shape in OpenAPI. Content orjson can't encode, such as an int beyond
+    64 bits, falls back to the standard library encoder.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            return super().render(content)
+
 
 app = FastAPI(
     title="API of Life",
     description="A self-evolving API that grows new features daily",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
-# In-memory store
+# In-memory store. Handlers are async and never await, so each request's reads and
+# writes (including index maintenance) run on the event loop without interleaving.
+# The store is per process: serve the app from a single worker (see README).
 items_db: dict[str, dict] = {}
 
+# Ids are zero-padded hex of a running counter, so they sort in creation order
+_next_id = count(1)
+
+# Secondary indexes over items_db, kept in sync by _index_item/_unindex_item
+by_active: dict[bool, set[str]] = defaultdict(set)
+by_priority: dict[int, set[str]] = defaultdict(set)
+by_tag: dict[str, set[str]] = defaultdict(set)
+created_index = SortedKeyList(key=itemgetter(0))  # (created_at timestamp key, id) pairs
+# Pre-sorted orders for sort_by=name/priority; created_at order is items_db's own order
+sorted_indexes: dict[str, SortedList] = {"name": SortedList(), "priority": SortedList()}  # (value, id) pairs
+# Lowercased names in order, so a name prefix is one contiguous range
+name_prefix_index = SortedList()  # (lowercased name, id) pairs
+
+# Lowercased column copies of the searchable text fields (id -> value, empty values
+# omitted), so search scans one flat column instead of every row dict
+search_columns: dict[str, dict[str, str]] = {"name": {}, "description": {}, "notes": {}}
+# All searchable fields joined per item, for searches that don't restrict search_fields
+search_blobs: dict[str, str] = {}  # each blob ends in "\0", so blobs can be concatenated
+# search_blobs concatenated with each blob's start offset and id, rebuilt lazily after writes,
+# so an unfiltered default search is a single C-level scan over one string
+_search_buffer: Optional[tuple[str, list[int], list[str]]] = None
+# Trigram -> ids of items whose search blob contains it. Any search of three or more
+# characters can only match items holding every trigram of the query, so the candidate
+# set comes from set intersections and only those items' text is compared
+search_trigrams: dict[str, set[str]] = defaultdict(set)
+
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+
+def _timestamp_key(moment: datetime) -> int:
+    """Turn a local timestamp into integer microseconds, so comparisons are int compares."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return (moment - _EPOCH) // _ONE_US
+
+
+def _bound_key(moment: Optional[datetime]) -> Optional[int]:
+    """_timestamp_key of a created_after/created_before bound, or None for no bound.
+
+    An aware bound near datetime's limits (e.g. 0001-01-01T00:00:00Z west of UTC) has no
+    local time to convert to, so it is treated as unbounded rather than failing the request.
+    """
+    if moment is None:
+        return None
+    try:
+        return _timestamp_key(moment)
+    except OverflowError:
+        return None
+
+
+_now = datetime.now  # local wall clock; tests swap it for a deterministic one
+
+
+def _now_iso() -> str:
+    """Current local time in ISO format, as stored in created_at/updated_at."""
+    return _now().isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _created_key(iso: str) -> int:
+    """_timestamp_key of a stored ISO timestamp, parsed once per distinct string.
+
+    A row's created_at never changes, yet every update and delete unindexes it and every
+    update re-indexes it, so repeat calls for a row are cache hits instead of a parse.
+    """
+    return _timestamp_key(datetime.fromisoformat(iso))
+
+
+def _index_item(item: dict) -> None:
+    """Add an item's id to every secondary index."""
+    item_id = item["id"]
+    by_active[item["active"]].add(item_id)
+    by_priority[item["priority"]].add(item_id)
+    for tag in item["tags"] or ():
+        by_tag[tag].add(item_id)
+    created_index.add((_created_key(item["created_at"]), item_id))
+    for field, index in sorted_indexes.items():
+        index.add((item[field], item_id))
+    name_prefix_index.add((item["name"].lower(), item_id))
+    for field, column in search_columns.items():
+        if item[field]:
+            column[item_id] = item[field].lower()
+    search_blobs[item_id] = "".join(column[item_id] + "\0" for column in search_columns.values() if item_id in column)
+    for gram in _trigrams(search_blobs[item_id]):
+        search_trigrams[gram].add(item_id)
+    _invalidate_search_buffer()
+
+
+def _trigrams(text: str) -> set[str]:
+    """Return every three-character substring of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _trigram_candidates(needle: str) -> set[str]:
+    """Return ids of items holding every trigram of needle (a superset of the true matches)."""
+    postings = sorted((search_trigrams.get(gram, set()) for gram in _trigrams(needle)), key=len)
+    return postings[0].intersection(*postings[1:])
+
+
+def _discard(index: dict, key, item_id: str) -> None:
+    """Remove an id from one index bucket, dropping the bucket once empty."""
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(item_id)
+        if not ids:
+            del index[key]
+
+
+def _unindex_item(item: dict) -> None:
+    """Remove an item's id from every secondary index."""
+    item_id = item["id"]
+    _discard(by_active, item["active"], item_id)
+    _discard(by_priority, item["priority"], item_id)
+    for tag in item["tags"] or ():
+        _discard(by_tag, tag, item_id)
+    created_index.remove((_created_key(item["created_at"]), item_id))
+    for field, index in sorted_indexes.items():
+        index.remove((item[field], item_id))
+    name_prefix_index.remove((item["name"].lower(), item_id))
+    for column in search_columns.values():
+        column.pop(item_id, None)
+    for gram in _trigrams(search_blobs.pop(item_id)):
+        _discard(search_trigrams, gram, item_id)
+    _invalidate_search_buffer()
+
+
+def reset_store() -> None:
+    """Empty the store together with its secondary indexes.
+
+    The indexes only ever hold ids from items_db, so an empty store means there is nothing to clear.
+    """
+    if not items_db:
+        return
+    items_db.clear()
+    by_active.clear()
+    by_priority.clear()
+    by_tag.clear()
+    created_index.clear()
+    for index in sorted_indexes.values():
+        index.clear()
+    name_prefix_index.clear()
+    for column in search_columns.values():
+        column.clear()
+    search_blobs.clear()
+    search_trigrams.clear()
+    _invalidate_search_buffer()
+
+
+def _invalidate_search_buffer() -> None:
+    """Mark the concatenated search buffer stale after a write."""
+    global _search_buffer
+    _search_buffer = None
+
+
+def _search_all(needle: str) -> set[str]:
+    """Return ids of items whose search blob contains needle, with one scan over all blobs."""
+    global _search_buffer
+    if _search_buffer is None:
+        ids = list(search_blobs)
+        blobs = list(search_blobs.values())
+        _search_buffer = ("".join(blobs), list(accumulate(map(len, blobs), initial=0)), ids)
+    text, starts, ids = _search_buffer
+    hits = set()
+    pos = text.find(needle)
+    while pos != -1:
+        row = bisect_right(starts, pos) - 1
+        hits.add(ids[row])
+        pos = text.find(needle, starts[row + 1])
+    return hits
+
+
+def _index_matches(active: Optional[bool], priority: Optional[int], tag_set: Optional[frozenset[str]]) -> list[set[str]]:
+    """Return the index id sets matching the given filters; an item must be in all of them."""
+    id_sets = []
+    if active is not None:
+        id_sets.append(by_active.get(active, set()))
+    if priority is not None:
+        id_sets.append(by_priority.get(priority, set()))
+    if tag_set:
+        id_sets.append(set().union(*(by_tag.get(tag, set()) for tag in tag_set)))
+    return id_sets
+
+
+def _intern_tags(tags: list[str]) -> list[str]:
+    """Intern tag strings so rows and by_tag share one object per distinct tag."""
+    return [sys.intern(tag) for tag in tags]
+
+
+# Incoming tag lists; interned tags make by_tag lookups hit the identity fast path
+Tags = Annotated[list[str], AfterValidator(_intern_tags)]
+
+
+# A year or year-month bound, which means the start of that period
+_REDUCED_DATE = re.compile(r"\d{4}(-\d{2})?")
+
+
+def _parse_date_bound(value: str) -> datetime:
+    """Parse an ISO 8601 bound, reading a bare YYYY or YYYY-MM as the start of that period."""
+    if _REDUCED_DATE.fullmatch(value):
+        value += "-01" * (2 - value.count("-"))
+    return datetime.fromisoformat(value)
+
+
+# created_after/created_before bounds: ISO 8601 strings parsed into datetimes. A plain
+# datetime param would accept other bare numbers as Unix epoch seconds, so
+# created_after=1700000000 would silently mean 2023; here it is a 422 instead
+IsoDatetime = Annotated[str, AfterValidator(_parse_date_bound)]
+
+
+def _null_to(default):
+    """Build a validator that turns an explicit null into the field's default."""
+    return BeforeValidator(lambda value: default if value is None else value)
+
 
 class ItemCreate(BaseModel):
     name: str
     description: Optional[str] = None
     notes: Optional[str] = None
-    tags: Optional[list[str]] = None
-    active: Optional[bool] = True
-    priority: Optional[int] = 0
+    tags: Optional[Tags] = None
+    # Documented as nullable since null is accepted, but an explicit null gets the
+    # default, so stored rows always hold a real value
+    active: Annotated[Optional[bool], _null_to(True)] = True
+    priority: Annotated[Optional[int], _null_to(0)] = 0
 
 
 class ItemPatch(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     notes: Optional[str] = None
-    tags: Optional[list[str]] = None
+    tags: Optional[Tags] = None
     active: Optional[bool] = None
     priority: Optional[int] = None
 
 
+_PATCH_FIELDS = tuple(ItemPatch.model_fields)
+
+
 class Item(BaseModel):
     id: str
     name: str
@@ -51,137 +306,217 @@ class Item(BaseModel):
     updated_at: str
 
 
+def store_item(row: dict) -> None:
+    """Put a complete row into the store under its id and index it."""
+    items_db[row["id"]] = row
+    _index_item(row)
+
+
+def insert_item(item: ItemCreate) -> dict:
+    """Store a new item built from a validated ItemCreate, index it and return its row."""
+    item_id = f"{next(_next_id):016x}"
+    now = _now_iso()
+    new_item = {
+        "id": item_id,
+        "name": item.name,
+        "description": item.description,
+        "notes": item.notes,
+        "tags": item.tags,
+        "active": item.active,
+        "priority": item.priority,
+        "created_at": now,
+        "updated_at": now
+    }
+    store_item(new_item)
+    return new_item
+
+
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "version": app.version}
 
 
-@app.get("/items", response_model=list[Item])
-def list_items(search: Optional[str] = None, search_fields: Optional[str] = None, limit: Optional[int] = None, sort: Optional[str] = None, sort_by: Optional[str] = None, created_after: Optional[str] = None, created_before: Optional[str] = None, tags: Optional[str] = None, offset: Optional[int] = None, active: Optional[bool] = None, priority: Optional[int] = None, min_priority: Optional[int] = None, max_priority: Optional[int] = None):
-    """List all items in the store. Optionally filter by name or description, sort by name or creation date, paginate with offset and limit results."""
-    items = list(items_db.values())
+def _reversed_keeping_ties(entries, key):
+    """Walk entries sorted ascending by key in descending order, lazily.
+
+    Entries with equal keys keep their original (creation) order, as a stable
+    sorted(..., reverse=True) would.
+    """
+    for _, ties in groupby(reversed(entries), key=key):
+        yield from reversed(list(ties))
+
+
+def _matching_ids(search: Optional[str], search_fields: Optional[str], created_after: Optional[datetime], created_before: Optional[datetime], tags: Optional[str], active: Optional[bool], priority: Optional[int], min_priority: Optional[int], max_priority: Optional[int], name_prefix: Optional[str]) -> Optional[set[str]]:
+    """Return ids of items matching the /items filters, or None when no filter is given."""
+    tag_set = frozenset(sys.intern(tag.strip()) for tag in tags.split(",")) if tags else None
+    id_sets = _index_matches(active, priority, tag_set)
+    if min_priority is not None or max_priority is not None:
+        id_sets.append(set().union(*(ids for p, ids in by_priority.items()
+                                     if (min_priority is None or p >= min_priority) and
+                                     (max_priority is None or p <= max_priority))))
+    if created_after is not None or created_before is not None:
+        after = _bound_key(created_after)
+        before = _bound_key(created_before)
+        id_sets.append({item_id for _, item_id in created_index.irange_key(after, before)})
+    if name_prefix:
+        prefix = name_prefix.lower()
+        id_sets.append({item_id for _, item_id in name_prefix_index.irange((prefix,), (prefix + "\U0010ffff",))})
+    candidates = None
+    if id_sets:
+        id_sets.sort(key=len)
+        candidates = id_sets[0].intersection(*id_sets[1:])
     if search:
         search_lower = search.lower()
-        fields = set(search_fields.split(",")) if search_fields else {"name", "description", "notes"}
-        items = [item for item in items if
-                 ("name" in fields and search_lower in item["name"].lower()) or
-                 ("description" in fields and item["description"] and search_lower in item["description"].lower()) or
-                 ("notes" in fields and item.get("notes") and search_lower in item["notes"].lower())]
-    if created_after:
-        items = [item for item in items if item["created_at"] >= created_after]
-    if created_before:
-        items = [item for item in items if item["created_at"] <= created_before]
-    if tags:
-        tag_list = [tag.strip() for tag in tags.split(",")]
-        items = [item for item in items if any(tag in item.get("tags", []) for tag in tag_list)]
-    if active is not None:
-        items = [item for item in items if item.get("active") == active]
-    if priority is not None:
-        items = [item for item in items if item.get("priority") == priority]
-    if min_priority is not None:
-        items = [i for i in items if i["priority"] >= min_priority]
-    if max_priority is not None:
-        items = [i for i in items if i["priority"] <= max_priority]
+        if search_fields:
+            fields = set(search_fields.split(","))
+            columns = [column for field, column in search_columns.items() if field in fields]
+        elif "\0" in search_lower:
+            # The blobs join fields with "\0", so a needle holding one must be matched
+            # against the separate columns, where no field contains it
+            columns = list(search_columns.values())
+        else:
+            columns = [search_blobs]
+        if len(search_lower) >= 3 and "\0" not in search_lower:
+            matches = _trigram_candidates(search_lower)
+            candidates = matches if candidates is None else candidates & matches
+        if candidates is None and not search_fields and "\0" not in search_lower:
+            candidates = _search_all(search_lower)
+        elif candidates is None:
+            candidates = {item_id for column in columns for item_id, value in column.items()
+                          if search_lower in value}
+        else:
+            candidates = {item_id for column in columns for item_id in candidates
+                          if item_id in column and search_lower in column[item_id]}
+    return candidates
+
+
+@app.get("/items", response_model=list[Item])
+async def list_items(search: Optional[str] = None, search_fields: Optional[str] = None, limit: Annotated[Optional[int], Query(ge=0)] = None, sort: Optional[str] = None, sort_by: Optional[str] = None, created_after: Optional[IsoDatetime] = None, created_before: Optional[IsoDatetime] = None, tags: Optional[str] = None, offset: Annotated[Optional[int], Query(ge=0)] = None, active: Optional[bool] = None, priority: Optional[int] = None, min_priority: Optional[int] = None, max_priority: Optional[int] = None, name_prefix: Optional[str] = None):
+    """List all items in the store. Optionally filter by name or description, sort by name or creation date, paginate with offset and limit results."""
+    candidates = _matching_ids(search, search_fields, created_after, created_before, tags, active, priority, min_priority, max_priority, name_prefix)
+    sort_key = None
     if sort in ["asc", "desc"]:
         sort_key = sort_by if sort_by in ["name", "created_at", "updated_at", "priority"] else "created_at"
-        items = sorted(items, key=lambda x: x[sort_key], reverse=(sort == "desc"))
-    if offset is not None:
-        items = items[offset:]
-    if limit is not None:
-        items = items[:limit]
-    return items
+    # Rows are produced lazily so that offset/limit stop the walk early; only
+    # sort_by=updated_at has to materialize and sort every match
+    if sort_key in sorted_indexes:
+        index = sorted_indexes[sort_key]
+        entries = _reversed_keeping_ties(index, itemgetter(0)) if sort == "desc" else index
+        ordered_ids = (item_id for _, item_id in entries)
+        if candidates is not None:
+            ordered_ids = (item_id for item_id in ordered_ids if item_id in candidates)
+        items = (items_db[item_id] for item_id in ordered_ids)
+    else:
+        # Both items_db and the sorted candidate ids are already in creation order
+        if candidates is None:
+            items = items_db.values()
+        else:
+            items = [items_db[item_id] for item_id in sorted(candidates)]
+        if sort_key == "created_at" and sort == "desc":
+            items = _reversed_keeping_ties(items, itemgetter("created_at"))
+        elif sort_key == "updated_at":
+            items = sorted(items, key=itemgetter("updated_at"), reverse=(sort == "desc"))
+    start = offset or 0
+    return ORJSONResponse(list(islice(items, start, None if limit is None else start + limit)))
 
 
 @app.post("/items", response_model=Item, status_code=201)
-def create_item(item: ItemCreate):
+async def create_item(item: ItemCreate):
     """Create a new item."""
-    item_id = str(uuid4())
-    now = datetime.now().isoformat()
-    new_item = {
-        "id": item_id,
-        "name": item.name,
-        "description": item.description,
-        "notes": item.notes,
-        "tags": item.tags,
-        "active": item.active if item.active is not None else True,
-        "priority": item.priority if item.priority is not None else 0,
-        "created_at": now,
-        "updated_at": now
-    }
-    items_db[item_id] = new_item
-    return new_item
+    return ORJSONResponse(insert_item(item), status_code=201)
+
+
+@app.post("/items/bulk", response_model=list[Item], status_code=201)
+async def create_items_bulk(items: list[ItemCreate]):
+    """Create several items in one request, returned in the order given."""
+    return ORJSONResponse([insert_item(item) for item in items], status_code=201)
 
 
 @app.get("/items/count")
-def get_items_count():
-    """Get the total number of items in the store."""
-    return {"count": len(items_db)}
+async def get_items_count(search: Optional[str] = None, search_fields: Optional[str] = None, created_after: Optional[IsoDatetime] = None, created_before: Optional[IsoDatetime] = None, tags: Optional[str] = None, active: Optional[bool] = None, priority: Optional[int] = None, min_priority: Optional[int] = None, max_priority: Optional[int] = None, name_prefix: Optional[str] = None, tag: Optional[str] = None):
+    """Get the total number of items in the store, or only those matching the /items filters and tag."""
+    candidates = _matching_ids(search, search_fields, created_after, created_before, tags, active, priority, min_priority, max_priority, name_prefix)
+    if tag is not None:
+        tagged = by_tag.get(tag, set())
+        candidates = tagged if candidates is None else candidates & tagged
+    return {"count": len(items_db) if candidates is None else len(candidates)}
 
 
 @app.delete("/items")
-def delete_all_items(tag: Optional[str] = None):
+async def delete_all_items(tag: Optional[str] = None):
     """Delete all items from the store, or only those matching a specific tag."""
     if tag is not None:
-        to_delete = [k for k, v in items_db.items() if tag in (v.get("tags") or [])]
+        to_delete = list(by_tag.get(tag, ()))
         for k in to_delete:
-            del items_db[k]
+            _unindex_item(items_db.pop(k))
         return {"deleted": len(to_delete)}
-    count = len(items_db)
-    items_db.clear()
-    return {"deleted": count}
+    deleted = len(items_db)
+    reset_store()
+    return {"deleted": deleted}
 
 
 @app.get("/items/{item_id}", response_model=Item)
-def get_item(item_id: str):
+async def get_item(item_id: str):
     """Get a single item by ID."""
     if item_id not in items_db:
         raise HTTPException(status_code=404, detail="Item not found")
-    return items_db[item_id]
+    return ORJSONResponse(items_db[item_id])
 
 
 @app.put("/items/{item_id}", response_model=Item)
-def update_item(item_id: str, item: ItemCreate):
+async def update_item(item_id: str, item: ItemCreate):
     """Update an item by ID."""
     if item_id not in items_db:
         raise HTTPException(status_code=404, detail="Item not found")
+    _unindex_item(items_db[item_id])
     items_db[item_id]["name"] = item.name
     items_db[item_id]["description"] = item.description
     items_db[item_id]["notes"] = item.notes
     items_db[item_id]["tags"] = item.tags
-    items_db[item_id]["active"] = item.active if item.active is not None else True
-    items_db[item_id]["priority"] = item.priority if item.priority is not None else 0
-    items_db[item_id]["updated_at"] = datetime.now().isoformat()
-    return items_db[item_id]
+    items_db[item_id]["active"] = item.active
+    items_db[item_id]["priority"] = item.priority
+    items_db[item_id]["updated_at"] = _now_iso()
+    _index_item(items_db[item_id])
+    return ORJSONResponse(items_db[item_id])
 
 
 @app.patch("/items/{item_id}", response_model=Item)
-def patch_item(item_id: str, item: ItemPatch):
+async def patch_item(item_id: str, item: ItemPatch):
     """Partially update an item by ID."""
     if item_id not in items_db:
         raise HTTPException(status_code=404, detail="Item not found")
-    updates = item.model_dump(exclude_none=True)
+    fields = item.__dict__
+    updates = [(field, fields[field]) for field in _PATCH_FIELDS if fields[field] is not None]
+    row = items_db[item_id]
     if updates:
-        items_db[item_id].update(updates)
-        items_db[item_id]["updated_at"] = datetime.now().isoformat()
-    return items_db[item_id]
+        _unindex_item(row)
+        for field, value in updates:
+            row[field] = value
+        row["updated_at"] = _now_iso()
+        _index_item(row)
+    return ORJSONResponse(row)
 
 
 @app.post("/items/{item_id}/duplicate", response_model=Item, status_code=201)
-def duplicate_item(item_id: str):
+async def duplicate_item(item_id: str):
     """Duplicate an existing item with a new ID and fresh timestamps."""
     if item_id not in items_db:
         raise HTTPException(status_code=404, detail="Item not found")
     source = items_db[item_id]
-    now = datetime.now().isoformat()
-    new_item = {**source, "id": str(uuid4()), "created_at": now, "updated_at": now}
-    items_db[new_item["id"]] = new_item
-    return new_item
+    now = _now_iso()
+    new_item = {**source, "id": f"{next(_next_id):016x}", "created_at": now, "updated_at": now}
+    store_item(new_item)
+    return ORJSONResponse(new_item, status_code=201)
 
 
 @app.delete("/items/{item_id}", status_code=204)
-def delete_item(item_id: str):
+async def delete_item(item_id: str):
     """Delete an item by ID."""
     if item_id not in items_db:
         raise HTTPException(status_code=404, detail="Item not found")
-    del items_db[item_id]
+    _unindex_item(items_db.pop(item_id))
+
+
+# Build and cache the OpenAPI schema at import instead of on the first /docs request
+app.openapi()
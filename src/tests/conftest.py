@@ -0,0 +1,71 @@
+"""Shared pytest configuration for the API of Life tests."""
+
+import httpx
+import pytest
+from main import ItemCreate, insert_item, store_item
+
+try:
+    import orjson
+except ImportError:  # orjson is a CPython extension; PyPy keeps httpx's stdlib json parsing
+    orjson = None
+
+# Rows built for each distinct seed marker, keyed by the marker's repr. The first test
+# with a given seed validates and inserts its items; later ones restore copies of the rows
+_SNAPSHOTS: dict[str, list[dict]] = {}
+
+
+def pytest_collection_modifyitems(config, items):
+    """Keep tests marked serial on a single xdist worker, and treat seeded tests as mutating.
+
+    Each xdist worker is its own process with its own items_db, so tests run in
+    parallel with ``-n auto --dist loadgroup``. Tests that must not interleave with
+    others are marked serial and grouped onto one worker.
+
+    Read-only tests are moved ahead of mutating ones (keeping file order within each
+    group), so they run back to back against the untouched empty store.
+    """
+    for item in items:
+        if item.get_closest_marker("serial"):
+            item.add_marker(pytest.mark.xdist_group("serial"))
+        if item.get_closest_marker("seed"):
+            item.add_marker(pytest.mark.mutates_db)
+    items.sort(key=lambda item: item.get_closest_marker("mutates_db") is not None)
+
+
+def _orjson_response_json(self, **kwargs):
+    """httpx.Response.json parsed with orjson, which takes no json.loads keyword options."""
+    return orjson.loads(self.content)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def orjson_responses():
+    """Parse every test response body with orjson, matching the app's ORJSONResponse on the way out."""
+    if orjson is None:
+        yield
+        return
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(httpx.Response, "json", _orjson_response_json)
+        yield
+
+
+@pytest.fixture
+def seeded_items(request):
+    """Insert the items listed in the test's seed marker directly into the store.
+
+    Each entry is a name or a dict of ItemCreate fields. Rows are built once per seed
+    through main.insert_item, so ids, timestamps and indexes match items created over
+    HTTP, then snapshotted; later tests with the same seed restore copies of those rows
+    with main.store_item, skipping validation and row construction.
+    """
+    marker = request.node.get_closest_marker("seed")
+    specs = marker.args[0] if marker else []
+    key = repr(specs)
+    snapshot = _SNAPSHOTS.get(key)
+    if snapshot is None:
+        rows = [insert_item(ItemCreate(**({"name": spec} if isinstance(spec, str) else spec))) for spec in specs]
+        _SNAPSHOTS[key] = [dict(row) for row in rows]
+        return rows
+    rows = [dict(row) for row in snapshot]
+    for row in rows:
+        store_item(row)
+    return rows
@@ -1,865 +1,1020 @@
 """Tests for the API of Life."""
 
+import re
+import time
+from datetime import datetime, timedelta
+from http import HTTPStatus
 import pytest
-from datetime import datetime
-from fastapi.testclient import TestClient
-from main import app, items_db
+import pytest_asyncio
+from itertools import count
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+import main
+from main import app, reset_store
 
+# Local ISO 8601 timestamp as emitted by the API, e.g. 2024-01-31T12:34:56.789000
+ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{6})?")
 
-@pytest.fixture(autouse=True)
-def clear_db():
-    """Clear the database before each test."""
-    items_db.clear()
-    yield
-    items_db.clear()
+# Starting time of the test clocks swapped in for main's wall clock
+CLOCK_START = datetime(2023, 11, 14, 22, 13, 20)
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+# Item bodies posted by several tests, serialized once here instead of by httpx on every call
+ITEM_BODIES = {name: f'{{"name":"{name}"}}'.encode()
+               for name in ("Item 1", "Item 2", "Item 3", "Item 4", "Untagged", "Updated")}
+TAGGED_WORK_BODY = b'{"name":"Tagged","tags":["work"]}'
+# Created out of priority order, so sorted listings differ from creation order
+PRIORITY_ITEMS = [
+    {"name": "High", "priority": 5},
+    {"name": "Low", "priority": 1},
+    {"name": "Medium", "priority": 3},
+]
 
-@pytest.fixture
-def client():
-    """Create a test client."""
-    return TestClient(app)
 
+def _insert(name: str, **fields) -> str:
+    """Insert an item straight into the store, bypassing HTTP, and return its id."""
+    return main.insert_item(main.ItemCreate(name=name, **fields))["id"]
 
-def test_health_check(client):
-    """Test the health check endpoint."""
-    response = client.get("/health")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["status"] == "healthy"
-    assert "version" in data
 
+def _ok(response, code: HTTPStatus = HTTPStatus.OK):
+    """Assert the response status and return its parsed JSON body."""
+    assert response.status_code == code
+    return response.json()
 
-def test_list_items_empty(client):
-    """Test listing items when store is empty."""
-    response = client.get("/items")
-    assert response.status_code == 200
-    assert response.json() == []
 
+def post_item(client, body: bytes):
+    """POST a pre-serialized item body to /items."""
+    return client.post("/items", content=body, headers=JSON_HEADERS)
 
-def test_create_item(client):
-    """Test creating a new item."""
-    response = client.post("/items", json={"name": "Test Item", "description": "A test"})
-    assert response.status_code == 201
-    data = response.json()
-    assert data["name"] == "Test Item"
-    assert data["description"] == "A test"
-    assert "id" in data
 
+@pytest_asyncio.fixture(scope="session")
+async def session_client():
+    """Create the one test client shared by the whole session.
 
-def test_create_item_minimal(client):
-    """Test creating an item with only required fields."""
-    response = client.post("/items", json={"name": "Minimal Item"})
-    assert response.status_code == 201
-    data = response.json()
-    assert data["name"] == "Minimal Item"
-    assert data["description"] is None
+    ASGITransport calls the app directly on the session's event loop, without the
+    portal thread TestClient uses to bridge sync tests to the async app.
 
+    A few requests are sent before the first test, so Starlette's lazily built middleware
+    stack and the first-call query, body and response paths of the list and create
+    routes are set up outside any test; the store is emptied again afterwards.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as test_client:
+        await test_client.get("/health")
+        await post_item(test_client, ITEM_BODIES["Item 1"])
+        await test_client.get("/items?search=item&sort=asc&sort_by=name")
+        reset_store()
+        yield test_client
 
-def test_get_item(client):
-    """Test getting a single item."""
-    # First create an item
-    create_response = client.post("/items", json={"name": "Get Test"})
-    item_id = create_response.json()["id"]
 
-    # Then retrieve it
-    response = client.get(f"/items/{item_id}")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["id"] == item_id
-    assert data["name"] == "Get Test"
+@pytest.fixture(autouse=True)
+def client(session_client):
+    """Start every test from an empty store and hand it the shared session client.
 
+    There is no teardown clear: whatever a test leaves behind is emptied by the next
+    test's setup, and reset_store is a single check when the store is already empty.
+    """
+    reset_store()
+    return session_client
 
-def test_get_item_not_found(client):
-    """Test getting a non-existent item."""
-    response = client.get("/items/nonexistent-id")
-    assert response.status_code == 404
 
+@pytest.fixture
+def advancing_clock(monkeypatch):
+    """Swap main's wall clock for one that moves 1ms forward on every read.
 
-def test_list_items_with_data(client):
-    """Test listing items after creating some."""
-    client.post("/items", json={"name": "Item 1"})
-    client.post("/items", json={"name": "Item 2"})
+    Each write then gets a distinct, strictly increasing timestamp without sleeping.
+    """
+    ticks = (CLOCK_START + timedelta(milliseconds=n) for n in count())
+    monkeypatch.setattr(main, "_now", ticks.__next__)
 
-    response = client.get("/items")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
 
+@pytest.fixture
+def created_item():
+    """Insert one item straight into the store and return its stored row."""
+    return main.insert_item(main.ItemCreate(name="Created Item", description="From the created_item fixture"))
 
-def test_delete_item(client):
-    """Test deleting an item."""
-    create_response = client.post("/items", json={"name": "Delete Me"})
-    item_id = create_response.json()["id"]
 
-    response = client.delete(f"/items/{item_id}")
-    assert response.status_code == 204
+@pytest.mark.parametrize("method, path, expected_status, expected_content", [
+    ("DELETE", "/items", HTTPStatus.OK, b'{"deleted":0}'),
+    ("GET", "/items/nonexistent-id", HTTPStatus.NOT_FOUND, b'{"detail":"Item not found"}'),
+], ids=["delete-all", "get-missing"])
+async def test_empty_state_requests(client, method, path, expected_status, expected_content):
+    """Test requests against the empty store end to end, comparing the raw response bodies."""
+    response = await client.request(method, path)
+    assert response.status_code == expected_status
+    assert response.content == expected_content
 
-    get_response = client.get(f"/items/{item_id}")
-    assert get_response.status_code == 404
 
+async def test_health_check():
+    """Test the health check handler, called directly without HTTP."""
+    assert await main.health_check() == {"status": "healthy", "version": app.version}
 
-def test_delete_item_not_found(client):
-    """Test deleting a non-existent item."""
-    response = client.delete("/items/nonexistent-id")
-    assert response.status_code == 404
 
+async def test_empty_store_handlers():
+    """Test the list and count handlers on the empty store, called directly without HTTP."""
+    assert (await main.list_items()).body == b"[]"
+    assert await main.get_items_count() == {"count": 0}
 
-def test_items_count_empty(client):
-    """Test item count when store is empty."""
-    response = client.get("/items/count")
-    assert response.status_code == 200
-    assert response.json() == {"count": 0}
 
+@pytest.mark.parametrize("call", [
+    lambda: main.get_item("nonexistent-id"),
+    lambda: main.update_item("nonexistent-id", main.ItemCreate(name="New Name")),
+    lambda: main.patch_item("nonexistent-id", main.ItemPatch(name="New Name")),
+    lambda: main.duplicate_item("nonexistent-id"),
+    lambda: main.delete_item("nonexistent-id"),
+], ids=["get", "update", "patch", "duplicate", "delete"])
+async def test_missing_item_handlers_raise_not_found(call):
+    """Test that item handlers raise 404 for an unknown id, called directly without HTTP."""
+    with pytest.raises(HTTPException) as excinfo:
+        await call()
+    assert (excinfo.value.status_code, excinfo.value.detail) == (HTTPStatus.NOT_FOUND, "Item not found")
 
-def test_items_count_with_data(client):
-    """Test item count after creating items."""
-    client.post("/items", json={"name": "Item 1"})
-    client.post("/items", json={"name": "Item 2"})
-    client.post("/items", json={"name": "Item 3"})
 
-    response = client.get("/items/count")
-    assert response.status_code == 200
-    assert response.json() == {"count": 3}
+@pytest.mark.mutates_db
+async def test_create_item(client):
+    """Test creating a new item."""
+    response = await client.post("/items", json={"name": "Test Item", "description": "A test"})
+    data = response.json()
+    assert (response.status_code, data["name"], data["description"], "id" in data) == (
+        HTTPStatus.CREATED, "Test Item", "A test", True)
 
 
-def test_search_items(client):
-    """Test searching items by name."""
-    client.post("/items", json={"name": "Apple Pie"})
-    client.post("/items", json={"name": "Banana Bread"})
-    client.post("/items", json={"name": "Apple Juice"})
+@pytest.mark.mutates_db
+async def test_create_item_minimal(client):
+    """Test creating an item with only required fields."""
+    response = await client.post("/items", json={"name": "Minimal Item"})
+    data = response.json()
+    assert (response.status_code, data["name"], data["description"]) == (HTTPStatus.CREATED, "Minimal Item", None)
 
-    response = client.get("/items?search=apple")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all("apple" in item["name"].lower() for item in items)
+
+@pytest.mark.mutates_db
+async def test_get_item(client, created_item):
+    """Test getting a single item."""
+    response = await client.get("/items/" + created_item["id"])
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == created_item
 
 
-def test_search_items_case_insensitive(client):
-    """Test that search is case-insensitive."""
-    client.post("/items", json={"name": "Test Item"})
-    client.post("/items", json={"name": "Another Thing"})
+@pytest.mark.seed(["Item 1", "Item 2", "Item 3"])
+async def test_list_items_with_data(client, seeded_items):
+    """Test listing items after creating some."""
+    response = await client.get("/items")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == seeded_items
+
+
+@pytest.mark.mutates_db
+async def test_delete_item(client, created_item):
+    """Test deleting an item."""
+    item_id = created_item["id"]
+    response = await client.delete("/items/" + item_id)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    get_response = await client.get("/items/" + item_id)
+    assert get_response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize("n", [
+    pytest.param(n, marks=pytest.mark.seed([f"Item {i}" for i in range(n)]), id=str(n))
+    for n in (0, 10, 1000, 10_000)
+])
+async def test_items_count_with_data(client, seeded_items, n):
+    """Test item count across store sizes, so a count that walks the store shows up as a slow case."""
+    assert len(main.items_db) == n
+    response = await client.get("/items/count")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'{"count":%d}' % n
 
-    response = client.get("/items?search=TEST")
-    assert response.status_code == 200
-    items = response.json()
+
+@pytest.mark.seed(["Apple Pie", "Banana Bread", "Apple Juice"])
+async def test_search_items(client, seeded_items):
+    """Test searching items by name."""
+    response = await client.get("/items?search=apple")
+    items = _ok(response)
+    assert {item["name"] for item in items} == {"Apple Pie", "Apple Juice"}
+
+
+@pytest.mark.seed(["Apple Pie", "Application", "Banana Bread"])
+async def test_search_prefix_match(client, seeded_items):
+    """Test that a search term matches names that start with it."""
+    response = await client.get("/items?search=app")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["name"] for item in response.json()] == ["Apple Pie", "Application"]
+
+
+@pytest.mark.seed(["Apple Pie", "Pineapple", "Banana Bread"])
+async def test_search_uses_index(client, seeded_items, monkeypatch):
+    """Test that searches of three or more characters are answered from the trigram index."""
+    def full_scan(needle):
+        raise AssertionError("search scanned every item")
+
+    monkeypatch.setattr(main, "_search_all", full_scan)
+    response = await client.get("/items?search=APPLE")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["name"] for item in response.json()] == ["Apple Pie", "Pineapple"]
+    assert main.search_trigrams["app"] == {seeded_items[0]["id"], seeded_items[1]["id"]}
+
+
+@pytest.mark.seed([
+    {"name": "Apple Pie", "description": "appetizer"},
+    "Application",
+    "Pineapple",
+])
+async def test_name_prefix_is_stricter_than_search(client, seeded_items):
+    """Test that name_prefix only matches name starts while search also matches inside names."""
+    search = (await client.get("/items?search=APP&search_fields=name")).json()
+    prefix = (await client.get("/items?name_prefix=APP")).json()
+    assert [item["name"] for item in prefix] == ["Apple Pie", "Application"]
+    assert [item["name"] for item in search] == ["Apple Pie", "Application", "Pineapple"]
+
+
+@pytest.mark.seed(["Test Item", "Another Thing"])
+async def test_search_items_case_insensitive(client, seeded_items):
+    """Test that search is case-insensitive."""
+    response = await client.get("/items?search=TEST")
+    items = _ok(response)
     assert len(items) == 1
     assert items[0]["name"] == "Test Item"
 
 
-def test_search_items_no_match(client):
+@pytest.mark.seed(["Foo", "Bar"])
+async def test_search_items_no_match(client, seeded_items):
     """Test searching with no matches."""
-    client.post("/items", json={"name": "Foo"})
-    client.post("/items", json={"name": "Bar"})
-
-    response = client.get("/items?search=baz")
-    assert response.status_code == 200
-    assert response.json() == []
+    response = await client.get("/items?search=baz")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'[]'
 
 
-def test_search_items_by_description(client):
+@pytest.mark.seed([
+    {"name": "Apple", "description": "A delicious red fruit"},
+    {"name": "Carrot", "description": "An orange vegetable"},
+    {"name": "Banana", "description": "A yellow fruit"},
+])
+async def test_search_items_by_description(client, seeded_items):
     """Test searching items by description."""
-    client.post("/items", json={"name": "Apple", "description": "A delicious red fruit"})
-    client.post("/items", json={"name": "Carrot", "description": "An orange vegetable"})
-    client.post("/items", json={"name": "Banana", "description": "A yellow fruit"})
-
-    response = client.get("/items?search=fruit")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all("fruit" in item["description"].lower() for item in items)
+    response = await client.get("/items?search=fruit")
+    items = _ok(response)
+    assert {item["name"] for item in items} == {"Apple", "Banana"}
 
 
-def test_search_items_by_name_or_description(client):
+@pytest.mark.seed([
+    {"name": "Orange Juice", "description": "Made from oranges"},
+    {"name": "Apple", "description": "Contains orange vitamin C"},
+    {"name": "Grape", "description": "Purple fruit"},
+])
+async def test_search_items_by_name_or_description(client, seeded_items):
     """Test searching items matches both name and description."""
-    client.post("/items", json={"name": "Orange Juice", "description": "Made from oranges"})
-    client.post("/items", json={"name": "Apple", "description": "Contains orange vitamin C"})
-    client.post("/items", json={"name": "Grape", "description": "Purple fruit"})
-
-    response = client.get("/items?search=orange")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?search=orange")
+    items = _ok(response)
     assert len(items) == 2
-    names = [item["name"] for item in items]
-    assert "Orange Juice" in names
-    assert "Apple" in names
+    assert {item["name"] for item in items} == {"Orange Juice", "Apple"}
 
 
-def test_list_items_with_limit(client):
+@pytest.mark.seed(["Item 1", "Item 2", "Item 3", "Item 4"])
+async def test_list_items_with_limit(client, seeded_items):
     """Test limiting the number of items returned."""
-    client.post("/items", json={"name": "Item 1"})
-    client.post("/items", json={"name": "Item 2"})
-    client.post("/items", json={"name": "Item 3"})
-    client.post("/items", json={"name": "Item 4"})
-
-    response = client.get("/items?limit=2")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?limit=2")
+    items = _ok(response)
     assert len(items) == 2
 
 
-def test_list_items_limit_with_search(client):
+@pytest.mark.seed(["Apple Pie", "Apple Juice", "Apple Tart"])
+async def test_list_items_limit_with_search(client, seeded_items):
     """Test limit works with search parameter."""
-    client.post("/items", json={"name": "Apple Pie"})
-    client.post("/items", json={"name": "Apple Juice"})
-    client.post("/items", json={"name": "Apple Tart"})
+    response = await client.get("/items?search=apple&limit=2")
+    items = _ok(response)
+    assert [item["name"] for item in items] == ["Apple Pie", "Apple Juice"]
 
-    response = client.get("/items?search=apple&limit=2")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all("apple" in item["name"].lower() for item in items)
 
-
-def test_item_has_created_timestamp(client):
+@pytest.mark.mutates_db
+async def test_item_has_created_timestamp(client):
     """Test that created items have a created_at timestamp."""
-    response = client.post("/items", json={"name": "Timestamped Item"})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "Timestamped Item"})
+    data = _ok(response, HTTPStatus.CREATED)
     assert "created_at" in data
 
     # Verify it's a valid ISO format timestamp
-    created_at = datetime.fromisoformat(data["created_at"])
-    assert isinstance(created_at, datetime)
-
-
-def test_sort_items_ascending(client):
-    """Test sorting items by creation date in ascending order."""
-    client.post("/items", json={"name": "First"})
-    client.post("/items", json={"name": "Second"})
-    client.post("/items", json={"name": "Third"})
-
-    response = client.get("/items?sort=asc")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 3
-    assert items[0]["name"] == "First"
-    assert items[2]["name"] == "Third"
-
+    assert ISO_TIMESTAMP.fullmatch(data["created_at"])
 
-def test_sort_items_descending(client):
-    """Test sorting items by creation date in descending order."""
-    client.post("/items", json={"name": "First"})
-    client.post("/items", json={"name": "Second"})
-    client.post("/items", json={"name": "Third"})
 
-    response = client.get("/items?sort=desc")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 3
-    assert items[0]["name"] == "Third"
-    assert items[2]["name"] == "First"
+@pytest.mark.seed(["First", "Second", "Third"])
+async def test_sort_items_by_creation_date_both_ways(client, seeded_items):
+    """Test that sort=asc lists items oldest first and sort=desc is its exact reverse."""
+    ascending = await client.get("/items?sort=asc")
+    descending = await client.get("/items?sort=desc")
+    assert ascending.status_code == descending.status_code == HTTPStatus.OK
+    items = ascending.json()
+    assert [item["name"] for item in items] == ["First", "Second", "Third"]
+    assert descending.json() == items[::-1]
 
 
-def test_sort_with_limit(client):
+@pytest.mark.seed(["First", "Second", "Third"])
+async def test_sort_with_limit(client, seeded_items):
     """Test sorting works with limit parameter."""
-    client.post("/items", json={"name": "First"})
-    client.post("/items", json={"name": "Second"})
-    client.post("/items", json={"name": "Third"})
 
-    response = client.get("/items?sort=desc&limit=2")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?sort=desc&limit=2")
+    items = _ok(response)
     assert len(items) == 2
     assert items[0]["name"] == "Third"
     assert items[1]["name"] == "Second"
 
 
-def test_update_item(client):
+@pytest.mark.mutates_db
+async def test_update_item(client):
     """Test updating an item."""
-    create_response = client.post("/items", json={"name": "Old Name", "description": "Old Desc"})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Old Name", description="Old Desc")
 
-    response = client.put(f"/items/{item_id}", json={"name": "New Name", "description": "New Desc"})
-    assert response.status_code == 200
+    response = await client.put("/items/" + item_id, json={"name": "New Name", "description": "New Desc"})
     data = response.json()
-    assert data["name"] == "New Name"
-    assert data["description"] == "New Desc"
-    assert data["id"] == item_id
-
-
-def test_update_item_not_found(client):
-    """Test updating a non-existent item."""
-    response = client.put("/items/nonexistent-id", json={"name": "New Name"})
-    assert response.status_code == 404
+    assert (response.status_code, data["id"], data["name"], data["description"]) == (
+        HTTPStatus.OK, item_id, "New Name", "New Desc")
 
 
-def test_update_item_partial(client):
+@pytest.mark.mutates_db
+async def test_update_item_partial(client):
     """Test updating an item with partial fields."""
-    create_response = client.post("/items", json={"name": "Original", "description": "Desc"})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Original", description="Desc")
 
-    response = client.put(f"/items/{item_id}", json={"name": "Updated"})
-    assert response.status_code == 200
+    response = await client.put("/items/" + item_id, content=ITEM_BODIES["Updated"], headers=JSON_HEADERS)
     data = response.json()
-    assert data["name"] == "Updated"
-    assert data["description"] is None
+    assert (response.status_code, data["name"], data["description"]) == (HTTPStatus.OK, "Updated", None)
 
 
-def test_item_has_updated_at_timestamp(client):
+@pytest.mark.mutates_db
+async def test_item_has_updated_at_timestamp(client):
     """Test that created items have an updated_at timestamp."""
-    response = client.post("/items", json={"name": "Test Item"})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "Test Item"})
+    data = _ok(response, HTTPStatus.CREATED)
     assert "updated_at" in data
     assert data["created_at"] == data["updated_at"]  # Should be same on creation
 
 
-def test_update_item_changes_updated_at(client):
+@pytest.mark.mutates_db
+async def test_update_item_changes_updated_at(client, advancing_clock):
     """Test that updating an item changes the updated_at timestamp."""
-    import time
-
-    create_response = client.post("/items", json={"name": "Original"})
-    item_id = create_response.json()["id"]
-    original_updated_at = create_response.json()["updated_at"]
+    item_id = _insert("Original")
+    original_updated_at = main.items_db[item_id]["updated_at"]
 
-    time.sleep(0.01)  # Small delay to ensure different timestamp
-
-    update_response = client.put(f"/items/{item_id}", json={"name": "Updated"})
+    update_response = await client.put("/items/" + item_id, content=ITEM_BODIES["Updated"], headers=JSON_HEADERS)
     data = update_response.json()
     assert data["updated_at"] != original_updated_at
     assert data["created_at"] != data["updated_at"]  # Should be different after update
 
 
-def test_delete_all_items_empty(client):
-    """Test bulk delete on empty store."""
-    response = client.delete("/items")
-    assert response.status_code == 200
-    assert response.json() == {"deleted": 0}
-
-
-def test_delete_all_items_with_data(client):
+@pytest.mark.seed(["Item 1", "Item 2", "Item 3"])
+async def test_delete_all_items_with_data(client, seeded_items):
     """Test bulk delete removes all items."""
-    client.post("/items", json={"name": "Item 1"})
-    client.post("/items", json={"name": "Item 2"})
-    client.post("/items", json={"name": "Item 3"})
-
-    response = client.delete("/items")
-    assert response.status_code == 200
-    assert response.json() == {"deleted": 3}
+    response = await client.delete("/items")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'{"deleted":3}'
 
-    list_response = client.get("/items")
-    assert list_response.json() == []
+    list_response = await client.get("/items")
+    assert list_response.content == b'[]'
 
 
-def test_filter_by_created_after(client):
+@pytest.mark.mutates_db
+async def test_filter_by_created_after(client, advancing_clock):
     """Test filtering items by created_after date."""
-    import time
-
-    response1 = client.post("/items", json={"name": "Item 1"})
+    response1 = await post_item(client, ITEM_BODIES["Item 1"])
     item1_created = response1.json()["created_at"]
 
-    time.sleep(0.01)
-
-    response2 = client.post("/items", json={"name": "Item 2"})
+    response2 = await post_item(client, ITEM_BODIES["Item 2"])
     item2_created = response2.json()["created_at"]
 
-    time.sleep(0.01)
-
-    client.post("/items", json={"name": "Item 3"})
+    await post_item(client, ITEM_BODIES["Item 3"])
 
     # Filter items created after item1
-    response = client.get(f"/items?created_after={item2_created}")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all(item["created_at"] >= item2_created for item in items)
+    response = await client.get(f"/items?created_after={item2_created}")
+    items = _ok(response)
+    matches = [item for item in items if item["created_at"] >= item2_created]
+    assert len(matches) == len(items) == 2
 
 
-def test_filter_by_created_before(client):
+@pytest.mark.mutates_db
+async def test_filter_by_created_before(client, advancing_clock):
     """Test filtering items by created_before date."""
-    import time
-
-    client.post("/items", json={"name": "Item 1"})
+    await post_item(client, ITEM_BODIES["Item 1"])
 
-    time.sleep(0.01)
-
-    response2 = client.post("/items", json={"name": "Item 2"})
+    response2 = await post_item(client, ITEM_BODIES["Item 2"])
     item2_created = response2.json()["created_at"]
 
-    time.sleep(0.01)
-
-    client.post("/items", json={"name": "Item 3"})
+    await post_item(client, ITEM_BODIES["Item 3"])
 
     # Filter items created before item3
-    response = client.get(f"/items?created_before={item2_created}")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all(item["created_at"] <= item2_created for item in items)
+    response = await client.get(f"/items?created_before={item2_created}")
+    items = _ok(response)
+    matches = [item for item in items if item["created_at"] <= item2_created]
+    assert len(matches) == len(items) == 2
 
 
-def test_filter_by_date_range(client):
+@pytest.mark.mutates_db
+async def test_filter_by_date_range(client, advancing_clock):
     """Test filtering items by date range (created_after and created_before)."""
-    import time
-
-    client.post("/items", json={"name": "Item 1"})
+    await post_item(client, ITEM_BODIES["Item 1"])
 
-    time.sleep(0.01)
-
-    response2 = client.post("/items", json={"name": "Item 2"})
+    response2 = await post_item(client, ITEM_BODIES["Item 2"])
     item2_created = response2.json()["created_at"]
 
-    time.sleep(0.01)
-
-    response3 = client.post("/items", json={"name": "Item 3"})
+    response3 = await post_item(client, ITEM_BODIES["Item 3"])
     item3_created = response3.json()["created_at"]
 
-    time.sleep(0.01)
-
-    client.post("/items", json={"name": "Item 4"})
+    await post_item(client, ITEM_BODIES["Item 4"])
 
     # Filter items in the middle range
-    response = client.get(f"/items?created_after={item2_created}&created_before={item3_created}")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get(f"/items?created_after={item2_created}&created_before={item3_created}")
+    items = _ok(response)
     assert len(items) == 2
-    names = [item["name"] for item in items]
-    assert "Item 2" in names
-    assert "Item 3" in names
+    assert {item["name"] for item in items} == {"Item 2", "Item 3"}
 
 
-def test_create_item_with_tags(client):
+@pytest.mark.mutates_db
+async def test_create_item_with_tags(client):
     """Test creating an item with tags."""
-    response = client.post("/items", json={"name": "Tagged Item", "tags": ["work", "urgent"]})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "Tagged Item", "tags": ["work", "urgent"]})
+    data = _ok(response, HTTPStatus.CREATED)
     assert data["tags"] == ["work", "urgent"]
 
 
-def test_filter_items_by_tag(client):
+@pytest.mark.seed([
+    {"name": "Item 1", "tags": ["work", "urgent"]},
+    {"name": "Item 2", "tags": ["personal"]},
+    {"name": "Item 3", "tags": ["work"]},
+])
+async def test_filter_items_by_tag(client, seeded_items):
     """Test filtering items by a specific tag."""
-    client.post("/items", json={"name": "Item 1", "tags": ["work", "urgent"]})
-    client.post("/items", json={"name": "Item 2", "tags": ["personal"]})
-    client.post("/items", json={"name": "Item 3", "tags": ["work"]})
-
-    response = client.get("/items?tags=work")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?tags=work")
+    items = _ok(response)
     assert len(items) == 2
-    names = [item["name"] for item in items]
-    assert "Item 1" in names
-    assert "Item 3" in names
+    assert {item["name"] for item in items} == {"Item 1", "Item 3"}
 
 
-def test_update_item_with_tags(client):
+@pytest.mark.mutates_db
+async def test_update_item_with_tags(client):
     """Test updating an item's tags."""
-    create_response = client.post("/items", json={"name": "Item", "tags": ["old"]})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Item", tags=["old"])
 
-    response = client.put(f"/items/{item_id}", json={"name": "Item", "tags": ["new", "updated"]})
-    assert response.status_code == 200
-    data = response.json()
+    response = await client.put("/items/" + item_id, json={"name": "Item", "tags": ["new", "updated"]})
+    data = _ok(response)
     assert data["tags"] == ["new", "updated"]
 
 
-def test_list_items_with_offset(client):
+@pytest.mark.seed(["Item 1", "Item 2", "Item 3", "Item 4"])
+async def test_list_items_with_offset(client, seeded_items):
     """Test using offset to skip items."""
-    client.post("/items", json={"name": "Item 1"})
-    client.post("/items", json={"name": "Item 2"})
-    client.post("/items", json={"name": "Item 3"})
-    client.post("/items", json={"name": "Item 4"})
-
-    response = client.get("/items?offset=2")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?offset=2")
+    items = _ok(response)
     assert len(items) == 2
 
 
-def test_list_items_with_offset_and_limit(client):
+@pytest.mark.seed(["Item 1", "Item 2", "Item 3", "Item 4", "Item 5"])
+async def test_list_items_with_offset_and_limit(client, seeded_items):
     """Test offset and limit work together for pagination."""
-    client.post("/items", json={"name": "Item 1"})
-    client.post("/items", json={"name": "Item 2"})
-    client.post("/items", json={"name": "Item 3"})
-    client.post("/items", json={"name": "Item 4"})
-    client.post("/items", json={"name": "Item 5"})
-
-    response = client.get("/items?offset=1&limit=2")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?offset=1&limit=2")
+    items = _ok(response)
     assert len(items) == 2
 
 
-def test_sort_items_by_name_ascending(client):
-    """Test sorting items by name in ascending order."""
-    client.post("/items", json={"name": "Zebra"})
-    client.post("/items", json={"name": "Apple"})
-    client.post("/items", json={"name": "Mango"})
-
-    response = client.get("/items?sort=asc&sort_by=name")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 3
-    assert items[0]["name"] == "Apple"
-    assert items[1]["name"] == "Mango"
-    assert items[2]["name"] == "Zebra"
-
-
-def test_sort_items_by_name_descending(client):
-    """Test sorting items by name in descending order."""
-    client.post("/items", json={"name": "Zebra"})
-    client.post("/items", json={"name": "Apple"})
-    client.post("/items", json={"name": "Mango"})
-
-    response = client.get("/items?sort=desc&sort_by=name")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 3
-    assert items[0]["name"] == "Zebra"
-    assert items[1]["name"] == "Mango"
-    assert items[2]["name"] == "Apple"
+@pytest.mark.seed(["Zebra", "Apple", "Mango"])
+@pytest.mark.parametrize("order, expected", [
+    ("asc", ["Apple", "Mango", "Zebra"]),
+    ("desc", ["Zebra", "Mango", "Apple"]),
+])
+async def test_sort_items_by_name(client, seeded_items, order, expected):
+    """Test sorting items by name in either order."""
+    response = await client.get(f"/items?sort={order}&sort_by=name")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["name"] for item in response.json()] == expected
 
 
-def test_create_item_defaults_to_active(client):
+@pytest.mark.mutates_db
+async def test_create_item_defaults_to_active(client):
     """Test that items default to active=True."""
-    response = client.post("/items", json={"name": "Active Item"})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "Active Item"})
+    data = _ok(response, HTTPStatus.CREATED)
     assert data["active"] is True
 
 
-def test_create_inactive_item(client):
+@pytest.mark.mutates_db
+async def test_create_inactive_item(client):
     """Test creating an item with active=False."""
-    response = client.post("/items", json={"name": "Inactive Item", "active": False})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "Inactive Item", "active": False})
+    data = _ok(response, HTTPStatus.CREATED)
     assert data["active"] is False
 
 
-def test_filter_active_items(client):
+@pytest.mark.seed([
+    {"name": "Active Item", "active": True},
+    {"name": "Inactive Item", "active": False},
+    "Also Active",
+])
+async def test_filter_active_items(client, seeded_items):
     """Test filtering items by active status."""
-    client.post("/items", json={"name": "Active Item", "active": True})
-    client.post("/items", json={"name": "Inactive Item", "active": False})
-    client.post("/items", json={"name": "Also Active"})
-
-    response = client.get("/items?active=true")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all(item["active"] is True for item in items)
+    response = await client.get("/items?active=true")
+    items = _ok(response)
+    matches = [item for item in items if item["active"] is True]
+    assert len(matches) == len(items) == 2
 
-    response = client.get("/items?active=false")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?active=false")
+    items = _ok(response)
     assert len(items) == 1
     assert items[0]["name"] == "Inactive Item"
 
 
-def test_create_item_with_priority(client):
+@pytest.mark.mutates_db
+async def test_create_item_with_priority(client):
     """Test creating an item with priority."""
-    response = client.post("/items", json={"name": "High Priority", "priority": 5})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "High Priority", "priority": 5})
+    data = _ok(response, HTTPStatus.CREATED)
     assert data["priority"] == 5
 
 
-def test_filter_items_by_priority(client):
-    """Test filtering items by priority level."""
-    client.post("/items", json={"name": "Low", "priority": 1})
-    client.post("/items", json={"name": "High", "priority": 5})
-    client.post("/items", json={"name": "Also High", "priority": 5})
-
-    response = client.get("/items?priority=5")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 2
-    assert all(item["priority"] == 5 for item in items)
-
-
-def test_sort_items_by_priority_ascending(client):
-    """Test sorting items by priority in ascending order."""
-    client.post("/items", json={"name": "High", "priority": 5})
-    client.post("/items", json={"name": "Low", "priority": 1})
-    client.post("/items", json={"name": "Medium", "priority": 3})
-
-    response = client.get("/items?sort=asc&sort_by=priority")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 3
-    assert items[0]["priority"] == 1
-    assert items[1]["priority"] == 3
-    assert items[2]["priority"] == 5
-
-
-def test_sort_items_by_priority_descending(client):
-    """Test sorting items by priority in descending order."""
-    client.post("/items", json={"name": "High", "priority": 5})
-    client.post("/items", json={"name": "Low", "priority": 1})
-    client.post("/items", json={"name": "Medium", "priority": 3})
-
-    response = client.get("/items?sort=desc&sort_by=priority")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 3
-    assert items[0]["priority"] == 5
-    assert items[1]["priority"] == 3
-    assert items[2]["priority"] == 1
-
-
-def test_filter_items_by_min_priority(client):
-    """Test filtering items by minimum priority."""
-    client.post("/items", json={"name": "Low", "priority": 1})
-    client.post("/items", json={"name": "Medium", "priority": 3})
-    client.post("/items", json={"name": "High", "priority": 5})
-
-    response = client.get("/items?min_priority=3")
-    assert response.status_code == 200
-    items = response.json()
-    assert all(item["priority"] >= 3 for item in items)
-    assert len(items) == 2
+@pytest.mark.mutates_db
+async def test_create_item_with_priority_beyond_64_bits(client):
+    """Test that a priority orjson can't encode is still stored and listed."""
+    response = await client.post("/items", json={"name": "Big", "priority": 2**64})
+    assert response.status_code == HTTPStatus.CREATED
+    assert b'"priority":18446744073709551616' in response.content.replace(b" ", b"")
+    response = await client.get("/items")
+    assert response.status_code == HTTPStatus.OK
+    assert b'"priority":18446744073709551616' in response.content.replace(b" ", b"")
 
 
-def test_filter_items_by_max_priority(client):
-    """Test filtering items by maximum priority."""
-    client.post("/items", json={"name": "Low", "priority": 1})
-    client.post("/items", json={"name": "Medium", "priority": 3})
-    client.post("/items", json={"name": "High", "priority": 5})
-
-    response = client.get("/items?max_priority=3")
-    assert response.status_code == 200
-    items = response.json()
-    assert all(item["priority"] <= 3 for item in items)
-    assert len(items) == 2
-
+@pytest.mark.seed([
+    {"name": "Low", "priority": 1},
+    {"name": "High", "priority": 5},
+    {"name": "Also High", "priority": 5},
+])
+async def test_filter_items_by_priority(client, seeded_items):
+    """Test filtering items by priority level."""
+    response = await client.get("/items?priority=5")
+    items = _ok(response)
+    matches = [item for item in items if item["priority"] == 5]
+    assert len(matches) == len(items) == 2
 
-def test_filter_items_by_priority_range(client):
-    """Test filtering items by priority range (min and max)."""
-    client.post("/items", json={"name": "Low", "priority": 1})
-    client.post("/items", json={"name": "Medium", "priority": 3})
-    client.post("/items", json={"name": "High", "priority": 5})
 
-    response = client.get("/items?min_priority=2&max_priority=4")
-    assert response.status_code == 200
-    items = response.json()
-    assert len(items) == 1
-    assert items[0]["priority"] == 3
+@pytest.mark.seed(PRIORITY_ITEMS)
+@pytest.mark.parametrize("order, expected", [
+    ("asc", [1, 3, 5]),
+    ("desc", [5, 3, 1]),
+])
+async def test_sort_items_by_priority(client, seeded_items, order, expected):
+    """Test sorting items by priority in either order."""
+    response = await client.get(f"/items?sort={order}&sort_by=priority")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["priority"] for item in response.json()] == expected
 
 
-def test_create_item_with_notes(client):
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """Stop main's wall clock, so every write in the test shares one timestamp."""
+    monkeypatch.setattr(main, "_now", lambda: CLOCK_START)
+
+
+@pytest.mark.seed([
+    {"name": "Same", "description": "a"},
+    {"name": "Same", "description": "b"},
+    {"name": "Same", "description": "c"},
+    {"name": "Zed", "description": "d", "priority": 1},
+])
+@pytest.mark.parametrize("sort_by", ["priority", "name", "created_at"])
+async def test_sort_desc_keeps_ties_in_creation_order(client, frozen_clock, seeded_items, sort_by):
+    """Test that a descending sort lists items with equal values in creation order."""
+    response = await client.get(f"/items?sort=desc&sort_by={sort_by}")
+    descriptions = [item["description"] for item in _ok(response)]
+    assert descriptions == (["a", "b", "c", "d"] if sort_by == "created_at" else ["d", "a", "b", "c"])
+
+
+@pytest.mark.seed(PRIORITY_ITEMS)
+@pytest.mark.parametrize("query, expected", [
+    ("min_priority=3", [5, 3]),
+    ("max_priority=3", [1, 3]),
+    ("min_priority=2&max_priority=4", [3]),
+], ids=["min", "max", "range"])
+async def test_filter_items_by_priority_bounds(client, seeded_items, query, expected):
+    """Test filtering items by minimum and/or maximum priority, in creation order."""
+    response = await client.get(f"/items?{query}")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["priority"] for item in response.json()] == expected
+
+
+@pytest.mark.mutates_db
+async def test_create_item_with_notes(client):
     """Test creating an item with notes."""
-    response = client.post("/items", json={"name": "Item", "notes": "Some additional context"})
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/items", json={"name": "Item", "notes": "Some additional context"})
+    data = _ok(response, HTTPStatus.CREATED)
     assert data["notes"] == "Some additional context"
 
 
-def test_update_item_with_notes(client):
+@pytest.mark.mutates_db
+async def test_update_item_with_notes(client):
     """Test updating an item's notes."""
-    create_response = client.post("/items", json={"name": "Item", "notes": "Old notes"})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Item", notes="Old notes")
 
-    response = client.put(f"/items/{item_id}", json={"name": "Item", "notes": "Updated notes"})
-    assert response.status_code == 200
-    data = response.json()
+    response = await client.put("/items/" + item_id, json={"name": "Item", "notes": "Updated notes"})
+    data = _ok(response)
     assert data["notes"] == "Updated notes"
 
 
-def test_search_items_by_notes(client):
+@pytest.mark.seed([
+    {"name": "Item 1", "notes": "Meeting scheduled for tomorrow"},
+    {"name": "Item 2", "notes": "Follow up with client"},
+    {"name": "Item 3", "notes": "Schedule next meeting"},
+])
+async def test_search_items_by_notes(client, seeded_items):
     """Test searching items by notes field."""
-    client.post("/items", json={"name": "Item 1", "notes": "Meeting scheduled for tomorrow"})
-    client.post("/items", json={"name": "Item 2", "notes": "Follow up with client"})
-    client.post("/items", json={"name": "Item 3", "notes": "Schedule next meeting"})
-
-    response = client.get("/items?search=meeting")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?search=meeting")
+    items = _ok(response)
     assert len(items) == 2
-    names = [item["name"] for item in items]
-    assert "Item 1" in names
-    assert "Item 3" in names
+    assert {item["name"] for item in items} == {"Item 1", "Item 3"}
 
 
-def test_search_items_by_name_description_or_notes(client):
+@pytest.mark.seed([
+    {"name": "Project Alpha", "description": "Initial setup", "notes": "Check budget"},
+    {"name": "Budget Review", "description": "Monthly financial check", "notes": "Due next week"},
+    {"name": "Team Meeting", "description": "Weekly sync", "notes": "Discuss budget allocation"},
+])
+async def test_search_items_by_name_description_or_notes(client, seeded_items):
     """Test searching items matches name, description, or notes."""
-    client.post("/items", json={"name": "Project Alpha", "description": "Initial setup", "notes": "Check budget"})
-    client.post("/items", json={"name": "Budget Review", "description": "Monthly financial check", "notes": "Due next week"})
-    client.post("/items", json={"name": "Team Meeting", "description": "Weekly sync", "notes": "Discuss budget allocation"})
-
-    response = client.get("/items?search=budget")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?search=budget")
+    items = _ok(response)
     assert len(items) == 3
 
 
-def test_search_fields_name_only(client):
+@pytest.mark.seed([
+    {"name": "Alpha Project", "description": "budget tracking", "notes": "budget notes"},
+    {"name": "Budget Review", "description": "Monthly check", "notes": "Due soon"},
+])
+async def test_search_fields_name_only(client, seeded_items):
     """Test search_fields=name restricts search to name field only."""
-    client.post("/items", json={"name": "Alpha Project", "description": "budget tracking", "notes": "budget notes"})
-    client.post("/items", json={"name": "Budget Review", "description": "Monthly check", "notes": "Due soon"})
-
-    response = client.get("/items?search=budget&search_fields=name")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?search=budget&search_fields=name")
+    items = _ok(response)
     assert len(items) == 1
     assert items[0]["name"] == "Budget Review"
 
 
-def test_search_fields_multiple(client):
+@pytest.mark.seed([
+    {"name": "Alpha", "description": "budget info", "notes": "budget notes"},
+    {"name": "Beta", "description": "unrelated", "notes": "budget allocation"},
+])
+async def test_search_fields_multiple(client, seeded_items):
     """Test search_fields=name,description searches only those two fields."""
-    client.post("/items", json={"name": "Alpha", "description": "budget info", "notes": "budget notes"})
-    client.post("/items", json={"name": "Beta", "description": "unrelated", "notes": "budget allocation"})
-
-    response = client.get("/items?search=budget&search_fields=name,description")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?search=budget&search_fields=name,description")
+    items = _ok(response)
     assert len(items) == 1
     assert items[0]["name"] == "Alpha"
 
 
-def test_search_fields_default_behavior(client):
+@pytest.mark.seed([{"name": "Alpha", "description": "nothing", "notes": "budget note"}])
+async def test_search_fields_default_behavior(client, seeded_items):
     """Test that omitting search_fields still searches all fields."""
-    client.post("/items", json={"name": "Alpha", "description": "nothing", "notes": "budget note"})
-
-    response = client.get("/items?search=budget")
-    assert response.status_code == 200
+    response = await client.get("/items?search=budget")
+    assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 1
 
 
-def test_filter_items_by_multiple_tags(client):
+@pytest.mark.seed([
+    {"name": "Item 1", "tags": ["work", "urgent"]},
+    {"name": "Item 2", "tags": ["personal", "urgent"]},
+    {"name": "Item 3", "tags": ["work"]},
+    {"name": "Item 4", "tags": ["personal"]},
+])
+async def test_filter_items_by_multiple_tags(client, seeded_items):
     """Test filtering items by multiple tags (comma-separated)."""
-    client.post("/items", json={"name": "Item 1", "tags": ["work", "urgent"]})
-    client.post("/items", json={"name": "Item 2", "tags": ["personal", "urgent"]})
-    client.post("/items", json={"name": "Item 3", "tags": ["work"]})
-    client.post("/items", json={"name": "Item 4", "tags": ["personal"]})
-
-    response = client.get("/items?tags=work,urgent")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?tags=work,urgent")
+    items = _ok(response)
     assert len(items) == 3
-    names = [item["name"] for item in items]
-    assert "Item 1" in names
-    assert "Item 2" in names
-    assert "Item 3" in names
+    assert {item["name"] for item in items} == {"Item 1", "Item 2", "Item 3"}
 
 
-def test_sort_by_updated_at(client):
+@pytest.mark.mutates_db
+async def test_sort_by_updated_at(client, advancing_clock):
     """Test sorting items by updated_at returns recently-updated item first."""
-    r1 = client.post("/items", json={"name": "Item A"})
-    r2 = client.post("/items", json={"name": "Item B"})
+    r1 = await client.post("/items", json={"name": "Item A"})
+    await client.post("/items", json={"name": "Item B"})
     item_a_id = r1.json()["id"]
 
     # Update Item A so its updated_at is more recent than Item B's
-    client.put(f"/items/{item_a_id}", json={"name": "Item A Updated"})
+    await client.put("/items/" + item_a_id, json={"name": "Item A Updated"})
 
-    response = client.get("/items?sort=desc&sort_by=updated_at")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?sort=desc&sort_by=updated_at")
+    items = _ok(response)
     assert items[0]["id"] == item_a_id
 
 
-def test_patch_item_single_field(client):
+@pytest.mark.mutates_db
+async def test_patch_item_single_field(client):
     """Test patching a single field leaves other fields unchanged."""
-    create_response = client.post("/items", json={"name": "Original", "description": "Desc", "priority": 3})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Original", description="Desc", priority=3)
 
-    response = client.patch(f"/items/{item_id}", json={"name": "Patched"})
-    assert response.status_code == 200
+    response = await client.patch("/items/" + item_id, json={"name": "Patched"})
     data = response.json()
-    assert data["name"] == "Patched"
-    assert data["description"] == "Desc"
-    assert data["priority"] == 3
+    assert (response.status_code, data["name"], data["description"], data["priority"]) == (
+        HTTPStatus.OK, "Patched", "Desc", 3)
 
 
-def test_patch_item_multiple_fields(client):
+@pytest.mark.mutates_db
+async def test_patch_item_multiple_fields(client):
     """Test patching multiple fields at once."""
-    create_response = client.post("/items", json={"name": "Original", "priority": 1, "active": True})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Original", priority=1, active=True)
 
-    response = client.patch(f"/items/{item_id}", json={"priority": 5, "active": False})
-    assert response.status_code == 200
+    response = await client.patch("/items/" + item_id, json={"priority": 5, "active": False})
     data = response.json()
-    assert data["name"] == "Original"
-    assert data["priority"] == 5
-    assert data["active"] is False
-
-
-def test_patch_item_not_found(client):
-    """Test patching a non-existent item returns 404."""
-    response = client.patch("/items/nonexistent-id", json={"name": "X"})
-    assert response.status_code == 404
+    assert (response.status_code, data["name"], data["priority"], data["active"]) == (
+        HTTPStatus.OK, "Original", 5, False)
 
 
-def test_duplicate_item(client):
+@pytest.mark.mutates_db
+async def test_duplicate_item(client):
     """Test duplicating an item creates a copy with a new ID."""
-    create_response = client.post("/items", json={"name": "Original", "priority": 3, "tags": ["work"]})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Original", priority=3, tags=["work"])
 
-    response = client.post(f"/items/{item_id}/duplicate")
-    assert response.status_code == 201
+    response = await client.post("/items/" + item_id + "/duplicate")
     data = response.json()
+    assert (response.status_code, data["name"], data["priority"], data["tags"]) == (
+        HTTPStatus.CREATED, "Original", 3, ["work"])
     assert data["id"] != item_id
-    assert data["name"] == "Original"
-    assert data["priority"] == 3
-    assert data["tags"] == ["work"]
 
 
-def test_duplicate_item_not_found(client):
-    """Test duplicating a non-existent item returns 404."""
-    response = client.post("/items/nonexistent-id/duplicate")
-    assert response.status_code == 404
-
-
-def test_duplicate_item_stored_independently(client):
+@pytest.mark.mutates_db
+async def test_duplicate_item_stored_independently(client):
     """Test that the duplicate is stored and independent from the original."""
-    create_response = client.post("/items", json={"name": "Source"})
-    item_id = create_response.json()["id"]
+    item_id = _insert("Source")
 
-    dup_response = client.post(f"/items/{item_id}/duplicate")
+    dup_response = await client.post("/items/" + item_id + "/duplicate")
     dup_id = dup_response.json()["id"]
 
     # Both items exist
-    assert client.get(f"/items/{item_id}").status_code == 200
-    assert client.get(f"/items/{dup_id}").status_code == 200
+    assert (await client.get("/items/" + item_id)).status_code == HTTPStatus.OK
+    assert (await client.get("/items/" + dup_id)).status_code == HTTPStatus.OK
 
     # Total count is 2
-    assert client.get("/items/count").json()["count"] == 2
+    assert len(main.items_db) == 2
 
 
-def test_delete_items_by_tag(client):
+@pytest.mark.seed([
+    {"name": "Item 1", "tags": ["work", "urgent"]},
+    {"name": "Item 2", "tags": ["personal"]},
+    {"name": "Item 3", "tags": ["work"]},
+])
+async def test_delete_items_by_tag(client, seeded_items):
     """Test bulk delete by tag only removes matching items."""
-    client.post("/items", json={"name": "Item 1", "tags": ["work", "urgent"]})
-    client.post("/items", json={"name": "Item 2", "tags": ["personal"]})
-    client.post("/items", json={"name": "Item 3", "tags": ["work"]})
+    response = await client.delete("/items?tag=work")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'{"deleted":2}'
 
-    response = client.delete("/items?tag=work")
-    assert response.status_code == 200
-    assert response.json() == {"deleted": 2}
-
-    remaining = client.get("/items").json()
+    remaining = (await client.get("/items")).json()
     assert len(remaining) == 1
     assert remaining[0]["name"] == "Item 2"
 
 
-def test_delete_items_by_tag_no_match(client):
+@pytest.mark.mutates_db
+async def test_delete_items_by_tag_no_match(client):
     """Test bulk delete by tag with no matches returns 0."""
-    client.post("/items", json={"name": "Item 1", "tags": ["personal"]})
+    await client.post("/items", json={"name": "Item 1", "tags": ["personal"]})
 
-    response = client.delete("/items?tag=work")
-    assert response.status_code == 200
-    assert response.json() == {"deleted": 0}
-    assert len(client.get("/items").json()) == 1
+    response = await client.delete("/items?tag=work")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'{"deleted":0}'
+    assert len(main.items_db) == 1
 
 
-def test_delete_items_by_tag_untagged_items_unaffected(client):
+@pytest.mark.mutates_db
+async def test_delete_items_by_tag_untagged_items_unaffected(client):
     """Test that items without tags are not deleted when filtering by tag."""
-    client.post("/items", json={"name": "Tagged", "tags": ["work"]})
-    client.post("/items", json={"name": "Untagged"})
+    await post_item(client, TAGGED_WORK_BODY)
+    await post_item(client, ITEM_BODIES["Untagged"])
 
-    response = client.delete("/items?tag=work")
-    assert response.status_code == 200
-    assert response.json() == {"deleted": 1}
-    assert len(client.get("/items").json()) == 1
+    response = await client.delete("/items?tag=work")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'{"deleted":1}'
+    assert len(main.items_db) == 1
 
 
-def test_filter_items_by_multiple_tags_with_spaces(client):
+@pytest.mark.seed([
+    {"name": "Item 1", "tags": ["work", "important"]},
+    {"name": "Item 2", "tags": ["personal"]},
+    {"name": "Item 3", "tags": ["work"]},
+])
+async def test_filter_items_by_multiple_tags_with_spaces(client, seeded_items):
     """Test filtering items by multiple tags with spaces in query."""
-    client.post("/items", json={"name": "Item 1", "tags": ["work", "important"]})
-    client.post("/items", json={"name": "Item 2", "tags": ["personal"]})
-    client.post("/items", json={"name": "Item 3", "tags": ["work"]})
-
-    response = client.get("/items?tags=work, important")
-    assert response.status_code == 200
-    items = response.json()
+    response = await client.get("/items?tags=work, important")
+    items = _ok(response)
     assert len(items) == 2
-    names = [item["name"] for item in items]
-    assert "Item 1" in names
-    assert "Item 3" in names
+    assert {item["name"] for item in items} == {"Item 1", "Item 3"}
+
+
+@pytest.mark.mutates_db
+async def test_filters_follow_patch_and_delete(client):
+    """Test that filters reflect items after they are patched or deleted."""
+    r1 = await client.post("/items", json={"name": "Item 1", "priority": 1, "tags": ["work"]})
+    r2 = await client.post("/items", json={"name": "Item 2", "priority": 1, "tags": ["work"]})
+    await client.patch("/items/" + r1.json()["id"], json={"priority": 5, "tags": ["home"]})
+    await client.delete("/items/" + r2.json()["id"])
+
+    assert (await client.get("/items?priority=1")).content == b'[]'
+    assert (await client.get("/items?tags=work")).content == b'[]'
+    items = (await client.get("/items?priority=5&tags=home")).json()
+    assert [item["name"] for item in items] == ["Item 1"]
+
+
+@pytest.mark.mutates_db
+async def test_filter_by_tag_skips_untagged_items(client):
+    """Test that tag filtering works when some items have no tags."""
+    await post_item(client, ITEM_BODIES["Untagged"])
+    await post_item(client, TAGGED_WORK_BODY)
+
+    response = await client.get("/items?tags=work")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["name"] for item in response.json()] == ["Tagged"]
+
+
+async def test_list_items_rejects_negative_pagination(client):
+    """Test that negative offset or limit values are rejected."""
+    assert (await client.get("/items?offset=-1")).status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert (await client.get("/items?limit=-1")).status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.mutates_db
+async def test_search_follows_updates(client):
+    """Test that search matches an item's current text after it is updated."""
+    item_id = _insert("Old Name", notes="old notes")
+    await client.put("/items/" + item_id, json={"name": "New Name"})
+
+    assert (await client.get("/items?search=old")).content == b'[]'
+    assert len((await client.get("/items?search=new")).json()) == 1
+
+
+@pytest.mark.mutates_db
+async def test_search_does_not_match_across_fields(client):
+    """Test that a search term cannot match by spanning two fields."""
+    await client.post("/items", json={"name": "Apple", "description": "Pie"})
+
+    response = await client.get("/items?search=applepie")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'[]'
+
+
+@pytest.mark.seed([{"name": "Apple", "description": "Delicious"}])
+@pytest.mark.parametrize("search", ["%00", "le%00", "e%00d", "le%00&priority=0"])
+async def test_search_with_nul_matches_nothing(client, seeded_items, search):
+    """Test that a search holding a NUL never matches the separators between fields."""
+    response = await client.get("/items?search=" + search)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b'[]'
+
+
+@pytest.mark.seed([
+    {"name": "Item 1", "priority": 5, "tags": ["work"]},
+    {"name": "Item 2", "priority": 5, "active": False, "tags": ["work"]},
+    {"name": "Item 3", "priority": 1, "tags": ["home"]},
+])
+async def test_items_count_with_filters(client, seeded_items):
+    """Test counting only the items that match active, priority and tag filters."""
+    assert (await client.get("/items/count?tag=work")).content == b'{"count":2}'
+    assert (await client.get("/items/count?active=true&priority=5")).content == b'{"count":1}'
+    assert (await client.get("/items/count?priority=5&tag=home")).content == b'{"count":0}'
+    assert (await client.get("/items/count?tags=work,home&tag=home")).content == b'{"count":1}'
+
+
+@pytest.mark.seed([
+    {"name": "Apple", "priority": 5, "tags": ["work"]},
+    {"name": "Apricot", "priority": 3, "tags": ["urgent"]},
+    {"name": "Banana", "priority": 1, "tags": ["home"]},
+])
+@pytest.mark.parametrize("query, expected", [
+    ("tags=work,urgent", 2),
+    ("min_priority=3", 2),
+    ("max_priority=3&tags=home,urgent", 2),
+    ("name_prefix=ap&min_priority=4", 1),
+    ("search=an", 1),
+])
+async def test_items_count_accepts_list_filters(client, seeded_items, query, expected):
+    """Test that /items/count takes the /items filter params and agrees with the listing."""
+    assert _ok(await client.get("/items/count?" + query)) == {"count": expected}
+    assert len(_ok(await client.get("/items?" + query))) == expected
+
+
+@pytest.mark.mutates_db
+async def test_item_ids_sort_in_creation_order(client):
+    """Test that newly created and duplicated items get increasing ids."""
+    first = (await client.post("/items", json={"name": "First"})).json()["id"]
+    second = (await client.post("/items", json={"name": "Second"})).json()["id"]
+    third = (await client.post("/items/" + first + "/duplicate")).json()["id"]
+
+    assert first < second < third
+
+
+@pytest.mark.mutates_db
+async def test_sort_by_name_with_filter_after_patch(client):
+    """Test that name sorting reflects patched names and respects filters."""
+    r1 = await client.post("/items", json={"name": "Zebra", "tags": ["zoo"]})
+    await client.post("/items", json={"name": "Mango", "tags": ["zoo"]})
+    await client.post("/items", json={"name": "Apple"})
+    await client.patch("/items/" + r1.json()["id"], json={"name": "Aardvark"})
+
+    response = await client.get("/items?sort=asc&sort_by=name&tags=zoo")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["name"] for item in response.json()] == ["Aardvark", "Mango"]
+
+
+@pytest.mark.parametrize("value", ["not-a-date", "1700000000", "2024-13"])
+async def test_filter_by_created_after_rejects_invalid_date(client, value):
+    """Test that a malformed created_after value, including a bare epoch number, is rejected."""
+    response = await client.get("/items?created_after=" + value)
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.seed(["Item 1", "Item 2"])
+@pytest.mark.parametrize("query, expected", [
+    ("created_after=2024", 2),
+    ("created_after=2024-06", 2),
+    ("created_before=2024", 0),
+    ("created_after=9999-12", 0),
+])
+async def test_filter_by_reduced_precision_date(client, seeded_items, query, expected):
+    """Test that a YYYY or YYYY-MM bound means the start of that year or month."""
+    assert len(_ok(await client.get("/items?" + query))) == expected
+    assert _ok(await client.get("/items/count?" + query)) == {"count": expected}
+
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    """Return a setter that switches the process's local timezone for one test."""
+    def set_timezone(name: str):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+    yield set_timezone
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.seed(["Item 1", "Item 2"])
+@pytest.mark.parametrize("timezone, query", [
+    ("America/New_York", "created_after=0001-01-01T00:00:00Z"),
+    ("Asia/Tokyo", "created_before=9999-12-31T23:59:59Z"),
+], ids=["min-west-of-utc", "max-east-of-utc"])
+async def test_filter_by_date_bound_beyond_local_range(client, seeded_items, local_timezone, timezone, query):
+    """Test that an aware bound with no local equivalent is treated as unbounded."""
+    local_timezone(timezone)
+    assert len(_ok(await client.get("/items?" + query))) == 2
+    assert _ok(await client.get("/items/count?" + query)) == {"count": 2}
+
+
+@pytest.mark.mutates_db
+async def test_search_after_delete_and_create(client):
+    """Test that unfiltered search sees items written since the previous search."""
+    r1 = await client.post("/items", json={"name": "Apple Pie"})
+    await client.post("/items", json={"name": "Banana Bread", "notes": "no apples"})
+    assert len((await client.get("/items?search=apple")).json()) == 2
+
+    await client.delete("/items/" + r1.json()["id"])
+    await client.post("/items", json={"name": "Apple Tart"})
+    names = [item["name"] for item in (await client.get("/items?search=apple")).json()]
+    assert names == ["Banana Bread", "Apple Tart"]
+
+
+@pytest.mark.seed(["Apple Pie", "application", "Pineapple"])
+async def test_filter_by_name_prefix(client, seeded_items):
+    """Test filtering items whose name starts with a prefix, case-insensitively."""
+    response = await client.get("/items?name_prefix=APP")
+    assert response.status_code == HTTPStatus.OK
+    assert [item["name"] for item in response.json()] == ["Apple Pie", "application"]
+
+
+@pytest.mark.mutates_db
+async def test_create_item_null_active_and_priority_get_defaults(client):
+    """Test that an explicit null for active or priority is stored as the default."""
+    response = await client.post("/items", json={"name": "Item", "active": None, "priority": None})
+    data = _ok(response, HTTPStatus.CREATED)
+    assert (data["active"], data["priority"]) == (True, 0)
+    response = await client.put("/items/" + data["id"], json={"name": "Item", "active": None, "priority": None})
+    data = _ok(response)
+    assert (data["active"], data["priority"]) == (True, 0)
+
+
+async def test_openapi_schema_documents_item_model(client):
+    """Test that the prebuilt OpenAPI schema still documents the Item response model."""
+    response = await client.get("/openapi.json")
+    assert response.status_code == HTTPStatus.OK
+    schemas = response.json()["components"]["schemas"]
+    assert "Item" in schemas
+    # ItemCreate accepts null for these and stores the default, so the schema must allow it
+    for field in ("active", "priority"):
+        assert {"type": "null"} in schemas["ItemCreate"]["properties"][field]["anyOf"]
+
+
+@pytest.mark.mutates_db
+async def test_create_items_bulk(client):
+    """Test creating several items in one request."""
+    response = await client.post("/items/bulk", json=[{"name": "First", "priority": 2}, {"name": "Second"}])
+    data = _ok(response, HTTPStatus.CREATED)
+    assert [item["name"] for item in data] == ["First", "Second"]
+    assert data[0]["priority"] == 2
+    assert data[1]["active"] is True
+    assert len(main.items_db) == 2
+
+
+async def test_create_items_bulk_rejects_invalid_item(client):
+    """Test that one invalid entry rejects the whole bulk request."""
+    response = await client.post("/items/bulk", json=[{"name": "Valid"}, {"description": "No name"}])
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert not main.items_db
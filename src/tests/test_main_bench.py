@@ -0,0 +1,109 @@
+"""Benchmarks for the API of Life's CRUD routes.
+
+They run only when pytest-benchmark is installed, and are skipped otherwise:
+
+    python -m pytest tests/test_main_bench.py
+
+Each round that writes to the store gets a fresh state from its pedantic setup, so
+side effects of earlier rounds never skew the timing of later ones.
+"""
+
+import asyncio
+import pytest
+from httpx import ASGITransport, AsyncClient
+from main import ItemCreate, app, insert_item, reset_store
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAS_BENCHMARK = True
+except ImportError:
+    HAS_BENCHMARK = False
+
+pytestmark = [
+    pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark is not installed"),
+    pytest.mark.mutates_db,
+    pytest.mark.serial,
+]
+
+ROUNDS = 50
+JSON_HEADERS = {"Content-Type": "application/json"}
+ITEM_BODY = b'{"name":"Benchmark Item","description":"A benchmark","tags":["work"]}'
+
+
+@pytest.fixture(scope="module")
+def request_sync():
+    """Return a blocking request(method, url, **kwargs) over one AsyncClient for the module.
+
+    benchmark calls its target synchronously, so each request is driven to completion on
+    a private event loop; the tests themselves are plain functions.
+    """
+    with asyncio.Runner() as runner:
+        client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+        def request(method, url, **kwargs):
+            return runner.run(client.request(method, url, **kwargs))
+
+        yield request
+        runner.run(client.aclose())
+    reset_store()
+
+
+def _one_item_request(method: str, suffix: str = "", **kwargs):
+    """Build a pedantic setup that empties the store, inserts one item and targets its URL."""
+    def setup():
+        reset_store()
+        item_id = insert_item(ItemCreate(name="Benchmark Item", tags=["work"]))["id"]
+        return (method, "/items/" + item_id + suffix), kwargs
+    return setup
+
+
+def test_bench_create_item(request_sync, benchmark):
+    """Benchmark creating an item in an empty store."""
+    response = benchmark.pedantic(request_sync, args=("POST", "/items"),
+                                  kwargs={"content": ITEM_BODY, "headers": JSON_HEADERS},
+                                  setup=reset_store, rounds=ROUNDS, iterations=1)
+    assert response.status_code == 201
+
+
+def test_bench_get_item(request_sync, benchmark):
+    """Benchmark getting a single item by ID."""
+    response = benchmark.pedantic(request_sync, setup=_one_item_request("GET"), rounds=ROUNDS, iterations=1)
+    assert response.status_code == 200
+
+
+def test_bench_update_item(request_sync, benchmark):
+    """Benchmark replacing an item with PUT."""
+    setup = _one_item_request("PUT", content=ITEM_BODY, headers=JSON_HEADERS)
+    response = benchmark.pedantic(request_sync, setup=setup, rounds=ROUNDS, iterations=1)
+    assert response.status_code == 200
+
+
+def test_bench_patch_item(request_sync, benchmark):
+    """Benchmark patching a single field of an item."""
+    setup = _one_item_request("PATCH", content=b'{"priority":3}', headers=JSON_HEADERS)
+    response = benchmark.pedantic(request_sync, setup=setup, rounds=ROUNDS, iterations=1)
+    assert response.status_code == 200
+
+
+def test_bench_duplicate_item(request_sync, benchmark):
+    """Benchmark duplicating an item."""
+    setup = _one_item_request("POST", "/duplicate")
+    response = benchmark.pedantic(request_sync, setup=setup, rounds=ROUNDS, iterations=1)
+    assert response.status_code == 201
+
+
+def test_bench_delete_item(request_sync, benchmark):
+    """Benchmark deleting an item by ID."""
+    response = benchmark.pedantic(request_sync, setup=_one_item_request("DELETE"), rounds=ROUNDS, iterations=1)
+    assert response.status_code == 204
+
+
+def test_bench_list_items(request_sync, benchmark):
+    """Benchmark a name-sorted search over 1000 items."""
+    reset_store()
+    for n in range(1000):
+        insert_item(ItemCreate(name=f"Item {n}", priority=n % 5, tags=["work"] if n % 2 else None))
+    response = benchmark.pedantic(request_sync, args=("GET", "/items?search=item 99&sort=asc&sort_by=name"),
+                                  rounds=ROUNDS, iterations=1)
+    assert response.status_code == 200
+    assert len(response.json()) == 11